@@ -1,73 +1,88 @@
 import streamlit as st
 import pandas as pd
-import os
-from supabase import create_client, Client
-import plotly.express as px 
-from dotenv import load_dotenv
+import numpy as np
+import pyarrow as pa
+from supabase import Client
+import plotly.express as px
+import plotly.graph_objects as go
+
+from data import get_supabase_client, get_shared_data
 
-load_dotenv()
 # --- Configuration ---
 # MUST MATCH the lowercase name used in your loader.py
-TABLE_NAME = "demographics_data1" 
-
-# --- 1. Supabase Client Initialization and Caching ---
+TABLE_NAME = "demographics_data1"
 
-# @st.cache_resource
-def get_supabase_client() -> Client:
-    """Initializes and returns the Supabase client, cached for performance."""
-    try:
-        # These environment variables are supplied by Modal's Secret object
-        url = os.environ.get("SUPABASE_URL")
-        key = os.environ.get("SUPABASE_KEY")
-        
-        if not url or not key:
-            # Return None if credentials aren't set (expected during early Modal deployment)
-            return None
-            
-        supabase_client: Client = create_client(url, key)
-        return supabase_client
-    except Exception as e:
-        st.error(f"❌ Supabase client initialization failed: {e}")
-        return None
+# --- 1. Supabase Client and Data Fetching (shared, see data.py) ---
 
 # Define the client object once
 supabase_client = get_supabase_client()
 
-# --- 2. Data Fetching ---
-
-#@st.cache_data(ttl=600) # Cache data for 10 minutes
 def fetch_data(client: Client) -> pd.DataFrame:
-    """Fetches all structured data from the table and performs type conversion."""
-    if client is None:
-        return pd.DataFrame()
-        
-    try:
-        # Fetch all columns, ordered by country and year
-        response = client.table(TABLE_NAME).select("*").order('country').order('year', desc=False).execute()
-        
-        df = pd.DataFrame(response.data)
-        
-        if df.empty:
-            return df
-            
-        # Ensure rates and year are numeric types for plotting
-        numeric_cols = [
-            'year', 'marriage_rate', 'divorce_rate', 'extracted_at', 'updated_at',
-        ]
-        
-        for col in numeric_cols:
-            # Convert to numeric, coercing errors to NaN
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    """Fetches the structured table via the shared, cached path."""
+    return get_shared_data(client, TABLE_NAME)
+
+@st.cache_data(ttl=600)
+def global_stats(df: pd.DataFrame) -> dict:
+    """Global mean rates, cached so widget interactions skip the column scans."""
+    return df[['marriage_rate', 'divorce_rate']].mean().to_dict()
+
+@st.cache_data(ttl=600)
+def raw_arrow_view(df: pd.DataFrame) -> pa.Table:
+    """Raw-data view pre-converted to Arrow, cached keyed on the data itself.
+
+    With the ArrowDtype columns from the fetch this is a zero-copy buffer
+    handoff, and st.dataframe (which speaks Arrow natively) skips its
+    per-rerun pandas -> Arrow serialization of the full table.
+    """
+    return pa.Table.from_pandas(
+        df[['country', 'year', 'marriage_rate', 'divorce_rate',
+            'extracted_at', 'updated_at']],
+        preserve_index=False,
+    )
 
-        # Convert 'year' to integer type
-        df['year'] = df['year'].fillna(0).astype(int)
-        
-        return df
+# --- 2. Downsampling for Plotting ---
+
+# Cap on points serialized into the Plotly figure JSON, per country trace
+MAX_POINTS_PER_TRACE = 1000
+
+def lttb_downsample(group: pd.DataFrame, n_out: int = MAX_POINTS_PER_TRACE) -> pd.DataFrame:
+    """Downsamples one country's trace with Largest-Triangle-Three-Buckets (LTTB).
+
+    Keeps the visual shape of the line while bounding how many points are
+    shipped to the browser. Groups already at or under the cap pass through
+    unchanged, so small datasets are unaffected.
+    """
+    n = len(group)
+    if n <= n_out:
+        return group
+
+    x = group['year'].to_numpy(dtype=float)
+    y = group['marriage_rate'].to_numpy(dtype=float)
+
+    # First and last points are always kept; the middle is split into buckets.
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    a = 0  # index of the previously selected point
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        # Third triangle vertex: average of the NEXT bucket (or the last point)
+        if i < n_out - 3:
+            avg_x = x[bounds[i + 1]:bounds[i + 2]].mean()
+            avg_y = y[bounds[i + 1]:bounds[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # Pick the point in this bucket forming the largest triangle
+        areas = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.nanargmax(areas)) if np.any(~np.isnan(areas)) else lo
+        keep[i + 1] = a
 
-    except Exception as e:
-        st.error(f"❌ Error fetching data from Supabase. Check if table name ({TABLE_NAME}) is correct.")
-        # st.code(e) # Uncomment for detailed database error
-        return pd.DataFrame()
+    return group.iloc[keep]
 
 # --- 3. Streamlit UI and Visualization ---
 
@@ -99,11 +114,13 @@ def main():
     st.subheader("Key Global Metrics")
     col1, col2, col3, col4 = st.columns(4)
     
-    # Safely calculate means across all data
+    # Safely calculate means across all data (cached; depends only on the
+    # full dataset, not on any widget state)
+    stats = global_stats(data_df)
     with col1:
-        st.metric("Avg Marriage Rate", f"{data_df['marriage_rate'].mean():.2f}")
+        st.metric("Avg Marriage Rate", f"{stats['marriage_rate']:.2f}")
     with col2:
-        st.metric("Avg Divorce Rate", f"{data_df['divorce_rate'].mean():.2f}")
+        st.metric("Avg Divorce Rate", f"{stats['divorce_rate']:.2f}")
     
 
     st.divider()
@@ -116,9 +133,19 @@ def main():
         
         st.subheader("1. Marriage Rate Trend")
         
+        # Downsample each country's trace so only a bounded number of points
+        # crosses the wire (full data stays server-side for the metrics/table).
+        # No sort needed: the query already orders by (country, year) and both
+        # the row filter and groupby preserve that order. Iterating the groupby
+        # keeps the country column in every group on all pandas versions
+        # (groupby.apply drops the grouping column on pandas >= 3.0).
+        plot_df = pd.concat(
+            [lttb_downsample(group) for _, group in filtered_df.groupby('country')]
+        )
+
         fig_age = px.line(
-            filtered_df.sort_values(by='year'),
-            x='year', 
+            plot_df,
+            x='year',
             y='marriage_rate', 
             color='country', 
             markers=True,
@@ -129,25 +156,38 @@ def main():
 
         st.subheader("2. Marriage Rate vs. Divorce Rate")
         
-        fig_scatter = px.scatter(
-            filtered_df,
-            x='divorce_rate',
-            y='marriage_rate',
-            color='country',
-            size='year', # Size indicates year (recency)
-            hover_data=['year', 'divorce_rate'],
-            title='Impact of Cohabitation Rate on Marriage Rate'
-        )
+        # WebGL traces built straight from the column buffers: one GL canvas
+        # instead of an SVG node per point, and no px pipeline overhead
+        year_min = float(filtered_df['year'].min())
+        year_span = max(float(filtered_df['year'].max()) - year_min, 1.0)
+
+        fig_scatter = go.Figure()
+        for country, group in filtered_df.groupby('country'):
+            # Marker size indicates year (recency), scaled to a 6-18 px range
+            sizes = 6 + 12 * (group['year'].to_numpy(dtype=float) - year_min) / year_span
+            fig_scatter.add_trace(go.Scattergl(
+                x=group['divorce_rate'].to_numpy(dtype=float),
+                y=group['marriage_rate'].to_numpy(dtype=float),
+                mode='markers',
+                name=country,
+                marker=dict(size=sizes),
+                customdata=group['year'].to_numpy(),
+                hovertemplate=(
+                    'year=%{customdata}<br>divorce_rate=%{x}<br>'
+                    'marriage_rate=%{y}<extra>%{fullData.name}</extra>'
+                ),
+            ))
         fig_scatter.update_layout(
-            xaxis_title="Cohabitation Rate (%)", 
-            yaxis_title="Marriage Rate (per 1,000)"
+            title='Impact of Cohabitation Rate on Marriage Rate',
+            xaxis_title="Cohabitation Rate (%)",
+            yaxis_title="Marriage Rate (per 1,000)",
+            legend_title_text='country'
         )
         st.plotly_chart(fig_scatter, use_container_width=True)
 
     st.subheader("3. Raw Extracted Data")
     st.dataframe(
-        data_df[['country', 'year', 'marriage_rate', 'divorce_rate', 
-                  'extracted_at', 'updated_at']],
+        raw_arrow_view(data_df),
         use_container_width=True,
         hide_index=True
     )
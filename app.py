@@ -1,50 +1,38 @@
 import streamlit as st
 import pandas as pd
-import os
-from supabase import create_client, Client
+from supabase import Client
 from datetime import datetime
 import altair as alt
 
+from data import get_supabase_client, get_shared_data
+
 # --- Supabase Connection Setup ---
-# Credentials are read from environment variables, which Modal will inject via the Secret
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Credentials and client construction live in the shared data module
 TABLE_NAME = "demographics_data" # Ensure this matches your loader.py table name
 
 def init_supabase_client() -> Client:
-    """Initializes the Supabase client."""
-    if not SUPABASE_URL or not SUPABASE_KEY:
+    """Returns the shared pooled Supabase client, stopping if credentials are missing."""
+    client = get_supabase_client()
+    if client is None:
         st.error("Supabase credentials not found. Please ensure SUPABASE_URL and SUPABASE_KEY are set in your Modal Secret.")
         st.stop()
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    return client
 
 # --- Data Fetching ---
-@st.cache_data(ttl=600) # Cache the data for 10 minutes
 def get_data(client: Client):
-    """Fetches all data from the Supabase table."""
-    try:
-        # Fetch data ordered by the most recently extracted records
-        response = client.table(TABLE_NAME).select("*").order("extracted_at", desc=True).execute()
-        
-        # Check if response data is valid
-        if response.data:
-            df = pd.DataFrame(response.data)
-            
-            # Convert rates to numeric, setting errors to NaN
-            df['marriage_rate'] = pd.to_numeric(df['marriage_rate'], errors='coerce')
-            df['divorce_rate'] = pd.to_numeric(df['divorce_rate'], errors='coerce')
-            
-            # Drop rows where both rates are null, as they are not useful for visualization
-            df.dropna(subset=['marriage_rate', 'divorce_rate'], how='all', inplace=True)
-            
-            return df
-        else:
-            st.warning("No data found in the Supabase table.")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        st.error(f"Error fetching data from Supabase: {e}")
-        return pd.DataFrame()
+    """Fetches the table via the shared, session-cached path."""
+    # (country, year) is the unique PK appended as a tiebreaker: extracted_at
+    # is mostly NULL in this pipeline, and concurrent .range() pages are only
+    # correct under a total order
+    df = get_shared_data(
+        client, TABLE_NAME,
+        order=(("extracted_at", True), ("country", False), ("year", False)),
+    )
+    if df.empty:
+        st.warning("No data found in the Supabase table.")
+        return df
+    # Drop rows where both rates are null, as they are not useful for visualization
+    return df.dropna(subset=['marriage_rate', 'divorce_rate'], how='all')
 
 # --- Streamlit UI and Visualization ---
 def run_app():
@@ -98,7 +86,9 @@ def run_app():
             color=alt.Color('country', title='Country'),
             tooltip=['country', 'year', 'marriage_rate', 'divorce_rate']
         ).properties(
-            title="Correlation Between Marriage and Divorce Rates"
+            title="Correlation Between Marriage and Divorce Rates",
+            # Render on a canvas instead of one SVG DOM node per point
+            usermeta={"embedOptions": {"renderer": "canvas"}}
         ).interactive() # Allows zooming and panning
 
         st.altair_chart(scatter_chart, use_container_width=True)
@@ -0,0 +1,142 @@
+import streamlit as st
+import pandas as pd
+import os
+import httpx
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from math import ceil
+from supabase import create_client, Client
+from supabase.client import ClientOptions
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Shared Supabase Access ---
+# UI.py and app.py previously each built their own client and re-fetched the
+# whole table. This module gives both dashboards one pooled client and one
+# cached, paged fetch path, with a per-session copy in st.session_state so a
+# rerun (or a second page in the same session) touches the network zero times.
+
+# Supabase REST caps a single response at 1000 rows by default; fetch pages
+# of this size concurrently instead of one blocking request
+PAGE_SIZE = 1000
+MAX_FETCH_WORKERS = 8
+
+# Only the columns the dashboards actually render; the default projection so
+# neither app pays for table width it discards client-side anyway
+SELECT_COLUMNS = "country,year,marriage_rate,divorce_rate,extracted_at,updated_at"
+
+# Typed Arrow schema so numeric parsing happens in one vectorized C pass
+# instead of per-column pd.to_numeric sweeps. extracted_at/updated_at are
+# UNIX-epoch floats throughout this pipeline (see structurer.py's prompt).
+ARROW_SCHEMA = pa.schema([
+    ('country', pa.string()),
+    ('year', pa.int32()),
+    ('marriage_rate', pa.float32()),
+    ('divorce_rate', pa.float32()),
+    ('extracted_at', pa.float64()),
+    ('updated_at', pa.float64()),
+])
+
+@st.cache_resource
+def get_supabase_client() -> Client:
+    """Initializes and returns the Supabase client, cached for performance."""
+    try:
+        # These environment variables are supplied by Modal's Secret object
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_KEY")
+
+        if not url or not key:
+            # Return None if credentials aren't set (expected during early Modal deployment)
+            return None
+
+        # Pooled HTTP/2 transport so reruns reuse the same TLS session instead
+        # of paying a fresh handshake on every Streamlit interaction
+        http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+        supabase_client: Client = create_client(
+            url, key, options=ClientOptions(httpx_client=http_client)
+        )
+        return supabase_client
+    except Exception as e:
+        st.error(f"❌ Supabase client initialization failed: {e}")
+        return None
+
+@st.cache_data(ttl=600) # Cache data for 10 minutes
+def fetch_table(_client: Client, table_name: str, select_columns: str = SELECT_COLUMNS,
+                order: tuple = (("country", False), ("year", False))) -> pd.DataFrame:
+    """Fetches a table as a typed DataFrame via concurrent ranged requests.
+
+    order is a tuple of (column, descending) pairs so the cache can hash it.
+    The client argument is underscore-prefixed so Streamlit skips hashing it.
+    """
+    if _client is None:
+        return pd.DataFrame()
+
+    try:
+        # Learn the row count first, then fan out ranged page requests
+        total = _client.table(table_name).select("year", count="exact").limit(1).execute().count or 0
+        if total == 0:
+            return pd.DataFrame()
+
+        def fetch_page(page: int) -> list:
+            query = _client.table(table_name).select(select_columns)
+            for column, desc in order:
+                query = query.order(column, desc=desc)
+            return (
+                query.range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE - 1)
+                .execute()
+                .data
+            )
+
+        n_pages = ceil(total / PAGE_SIZE)
+        if n_pages == 1:
+            pages = [fetch_page(0)]
+        else:
+            # Pages are independent range reads, so overlap the roundtrips
+            with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as pool:
+                pages = list(pool.map(fetch_page, range(n_pages)))
+
+        records = list(chain.from_iterable(pages))
+
+        # Parse the records into typed columns in Arrow's C loop, then hand
+        # the buffers to pandas; no per-column to_numeric passes needed
+        try:
+            table = pa.Table.from_pylist(records, schema=ARROW_SCHEMA)
+            df = table.to_pandas(types_mapper=pd.ArrowDtype)
+        except pa.ArrowInvalid:
+            # Live columns that don't match the schema (e.g. timestamptz
+            # columns returning ISO strings instead of epoch floats) fall
+            # back to untyped construction with the old coercion pass, so a
+            # schema mismatch degrades instead of blanking the dashboard
+            df = pd.DataFrame(records)
+            numeric_cols = ['year', 'marriage_rate', 'divorce_rate', 'extracted_at', 'updated_at']
+            present_cols = [col for col in numeric_cols if col in df.columns]
+            df[present_cols] = df[present_cols].apply(pd.to_numeric, errors='coerce')
+
+        if df.empty:
+            return df
+
+        # Convert 'year' to integer type
+        df['year'] = df['year'].fillna(0).astype(int)
+
+        return df
+
+    except Exception as e:
+        st.error(f"❌ Error fetching data from Supabase. Check if table name ({table_name}) is correct.")
+        # st.code(e) # Uncomment for detailed database error
+        return pd.DataFrame()
+
+def get_shared_data(client: Client, table_name: str, select_columns: str = SELECT_COLUMNS,
+                    order: tuple = (("country", False), ("year", False))) -> pd.DataFrame:
+    """Returns the table through the shared st.cache_data fetch path.
+
+    fetch_table's cache already shares one frame across sessions and reruns
+    (its lookup only hashes the small string/tuple arguments), and its
+    10-minute TTL keeps long-lived tabs refreshing -- so no extra
+    session-level pinning is layered on top.
+    """
+    return fetch_table(client, table_name, select_columns, order)
@@ -1,14 +1,18 @@
 import os
-import json
+import orjson
+import numpy as np
 import pandas as pd
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from datetime import datetime
 from pathlib import Path # Ensure Path is imported for consistent file handling
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Configuration ---
 STRUCTURED_JSON_PATH = Path("data/structured_data.json")
 TABLE_NAME = "demographics_data1" # Name your Supabase table
+UPSERT_CHUNK_SIZE = 500 # Rows per upsert request (stays under PostgREST payload limits)
+MAX_UPSERT_WORKERS = 4 # Concurrent upsert requests in flight
 
 load_dotenv()
 
@@ -39,9 +43,9 @@ def load_data_and_upsert(supabase: Client):
     # 1. Load the structured JSON
     try:
         print(f"⏳ Reading structured content from {STRUCTURED_JSON_PATH}...")
-        # Load the file created by structurer.py
-        with open(STRUCTURED_JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f) 
+        # Load the file created by structurer.py (orjson parses the raw bytes in C)
+        with open(STRUCTURED_JSON_PATH, "rb") as f:
+            data = orjson.loads(f.read())
             
         # Check root object type (must be a dictionary for the flattening logic to work)
         if not isinstance(data, dict):
@@ -53,47 +57,56 @@ def load_data_and_upsert(supabase: Client):
     except FileNotFoundError:
         print(f"❌ Error: {STRUCTURED_JSON_PATH} not found. Run structurer.py first!")
         return
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"❌ Error decoding JSON. Check file syntax: {e}")
         return
 
     # 2. Flatten the nested structure
-    # This loop deconstructs the JSON (Country -> Year -> Metrics) into a flat list of records.
-    flat_records = []
     for country, country_data in data.items():
         if not isinstance(country_data, dict):
             print(f"Warning: Skipping {country} as its data is not a dictionary.")
-            continue
-            
-        for year_str, year_data in country_data.items():
-            
-            # Use .copy() to avoid modifying the original dictionary structure
-            record = year_data.copy()
-            
-            # If the LLM didn't insert country/year keys (for robustness)
-            if 'country' not in record:
-                record["country"] = country 
-            if 'year' not in record:
-                # Attempt to convert the year key from the JSON structure to an integer
-                try:
-                    record["year"] = int(year_str)
-                except ValueError:
-                    print(f"Warning: Skipping record for {country}/{year_str} due to invalid year format.")
-                    continue
-            
-            # Add timestamps required by the database
-            current_time = datetime.utcnow().isoformat()
-            record["extracted_at"] = record.get("extracted_at", current_time) 
-            record["updated_at"] = current_time
-            
-            flat_records.append(record)
-            
+
+    # One comprehension deconstructs the JSON (Country -> Year -> Metrics) into a
+    # flat list of records; the outer country/year keys are defaults that the
+    # record's own keys override if the LLM inserted them (for robustness).
+    flat_records = [
+        {"country": country, "year_key": year_str, **year_data}
+        for country, country_data in data.items()
+        if isinstance(country_data, dict)
+        for year_str, year_data in country_data.items()
+        if isinstance(year_data, dict)
+    ]
+
     if not flat_records:
         print("❌ No valid records were flattened. Check LLM output structure.")
         return
 
-    # 3. Convert to Pandas DataFrame
-    df = pd.DataFrame(flat_records)
+    # 3. Convert to Pandas DataFrame and fix up keys/timestamps in bulk
+    df = pd.json_normalize(flat_records)
+
+    # Fall back to the JSON year key where the LLM omitted the 'year' field
+    if 'year' not in df.columns:
+        df['year'] = pd.NA
+    df['year'] = pd.to_numeric(df['year'], errors='coerce').fillna(
+        pd.to_numeric(df['year_key'], errors='coerce')
+    )
+    invalid_year = df['year'].isna()
+    if invalid_year.any():
+        print(f"Warning: Skipping {int(invalid_year.sum())} record(s) due to invalid year format.")
+        df = df[~invalid_year]
+    # Cast back to integer: the fillna chain promotes the column to float64,
+    # and Postgres rejects e.g. 2012.0 for the INTEGER year primary key
+    df['year'] = df['year'].astype(int)
+    df = df.drop(columns='year_key')
+
+    # Add timestamps required by the database -- computed once, assigned vectorized
+    current_time = datetime.utcnow().isoformat()
+    if 'extracted_at' in df.columns:
+        df['extracted_at'] = df['extracted_at'].fillna(current_time)
+    else:
+        df['extracted_at'] = current_time
+    df['updated_at'] = current_time
+
     print(f"✅ Converted to DataFrame with {len(df)} rows.")
 
     # 4. Handle data types for database insertion
@@ -106,31 +119,58 @@ def load_data_and_upsert(supabase: Client):
         'updated_at',
     ]
     
-    for col in numeric_cols:
-        if col in df.columns:
-            # Convert to numeric, coercing errors (non-numeric or missing values become NaN)
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Replace NaN or None with None for proper Supabase handling of NULL values (important for REAL/float columns)
-    df = df.where(pd.notna(df), None)
-    
+    # Convert to numeric in one call, coercing errors (non-numeric or missing
+    # values become NaN); a single block assignment avoids the per-column
+    # BlockManager reallocation the old loop caused
+    present_cols = [col for col in numeric_cols if col in df.columns]
+    df[present_cols] = df[present_cols].apply(pd.to_numeric, errors='coerce')
+
+    # Sanitize non-finite rate values (inf/-inf from bad LLM output) to NaN in
+    # one vectorized pass over the raw float buffer, so nothing unstorable
+    # reaches the REAL columns downstream
+    rate_cols = [c for c in ('marriage_rate', 'divorce_rate') if c in df.columns]
+    if rate_cols:
+        rates = df[rate_cols].to_numpy(dtype=np.float64)
+        rates[~np.isfinite(rates)] = np.nan
+        df[rate_cols] = rates
+
+    # Replace NaN with None for proper Supabase handling of NULL values
+    # (important for REAL/float columns). Only columns that actually contain
+    # nulls get the object cast -- a whole-frame where() would allocate a
+    # boolean mask plus a second full DataFrame for nothing.
+    for col in df.columns[df.isna().any()]:
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+
     # Convert DataFrame back to a list of dicts for the Supabase upsert function
     records_to_upsert = df.to_dict('records')
 
-    print(f"⏳ Upserting {len(records_to_upsert)} records into table '{TABLE_NAME}'...")
+    # Split into bounded chunks so no single request can time out or trip
+    # PostgREST's payload limit, then overlap the roundtrips
+    chunks = [
+        records_to_upsert[i:i + UPSERT_CHUNK_SIZE]
+        for i in range(0, len(records_to_upsert), UPSERT_CHUNK_SIZE)
+    ]
+    print(f"⏳ Upserting {len(records_to_upsert)} records into table '{TABLE_NAME}' in {len(chunks)} chunk(s)...")
 
     # 5. Upsert/Insert the data
     try:
         # Assumes 'country' and 'year' are the composite primary key for upsert
-        response = supabase.table(TABLE_NAME).upsert(
-            records_to_upsert, 
-            on_conflict="country, year" 
-        ).execute()
+        def upsert_chunk(chunk: list) -> object:
+            return supabase.table(TABLE_NAME).upsert(
+                chunk,
+                on_conflict="country, year"
+            ).execute()
 
-        if response.data and isinstance(response.data, list):
-            print(f"✅ Data upsert successful. {len(response.data)} rows processed/updated.")
+        with ThreadPoolExecutor(max_workers=MAX_UPSERT_WORKERS) as pool:
+            responses = list(pool.map(upsert_chunk, chunks))
+
+        processed = sum(
+            len(r.data) for r in responses if r.data and isinstance(r.data, list)
+        )
+        if processed:
+            print(f"✅ Data upsert successful. {processed} rows processed/updated.")
         else:
-            print(f"❌ Upsert returned an unexpected response. Rows processed: {len(response.data)}")
+            print("❌ Upsert returned an unexpected response. Rows processed: 0")
             
     except Exception as e:
         print(f"❌ An error occurred during upsert: {e}")
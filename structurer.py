@@ -1,8 +1,8 @@
 import os
-import json
+import orjson
+import hashlib
 from openai import OpenAI
 from dotenv import load_dotenv
-import json
 from pathlib import Path
 
 
@@ -28,9 +28,27 @@ try:
     print(f"✅ Loaded raw blob. Length: {len(blob):,} characters.")
 except FileNotFoundError:
     print(f"❌ Error: {BLOB_PATH} not found. Run collector.py first!")
-    exit()        
+    exit()
 
-# --- 3. Prompt and API Call ---
+# --- 3. LLM Output Cache ---
+# The API call is the dominant wall-clock (and dollar) cost of the pipeline,
+# so cache its output keyed by the blob's content hash: re-runs on an
+# unchanged blob become a file read instead of an LLM roundtrip.
+CACHE_DIR = Path("data/cache")
+blob_hash = hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+cache_path = CACHE_DIR / f"{blob_hash}.json"
+
+data = None
+if cache_path.exists():
+    try:
+        with open(cache_path, "rb") as f:
+            data = orjson.loads(f.read())
+        print(f"✅ Reusing cached LLM output for unchanged blob: {cache_path}")
+    except orjson.JSONDecodeError:
+        print(f"⚠️ Cached file {cache_path} is corrupt. Re-running the LLM call.")
+        data = None
+
+# --- 4. Prompt and API Call ---
 
 # IMPORTANT: Ensure the schema here matches the columns expected by loader.py and UI.py!
 prompt = f"""
@@ -72,36 +90,42 @@ Text to analyze:
 """
 
 try:
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that extracts structured JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        # CRITICAL FIX: Use the JSON response format for reliable structured output
-        response_format={"type": "json_object"}
-    )
-
-    structured_json_str = response.choices[0].message.content
-    print("--- LLM Output Start ---")
-    # Print a snippet of the JSON for inspection
-    print(structured_json_str[:500] + "...") 
-    print("--- LLM Output End ---")
-    
-    # CRITICAL FIX: Parse the JSON string into a Python object for validation
-    data = json.loads(structured_json_str)
-    
+    if data is None:
+        response = client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that extracts structured JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            # CRITICAL FIX: Use the JSON response format for reliable structured output
+            response_format={"type": "json_object"}
+        )
+
+        structured_json_str = response.choices[0].message.content
+        print("--- LLM Output Start ---")
+        # Print a snippet of the JSON for inspection
+        print(structured_json_str[:500] + "...")
+        print("--- LLM Output End ---")
+
+        # CRITICAL FIX: Parse the JSON string into a Python object for validation
+        data = orjson.loads(structured_json_str)
+
+        # Store the validated output in the cache for future runs on this blob
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
     # Save the Python object directly to the file
     OUT_PATH = Path("data/structured_data.json")
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUT_PATH, "w", encoding="utf-8") as f:
-        # Use json.dump for a properly formatted, single-encoded JSON file
-        json.dump(data, f, indent=4) 
-        
+    with open(OUT_PATH, "wb") as f:
+        # orjson serializes straight to bytes, one encode pass, no str round-trip
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
     print(f"✅ Structured JSON saved successfully to: {OUT_PATH.resolve()}")
     print(f"Total top-level records (countries): {len(data)}")
 
-except json.JSONDecodeError as e:
+except orjson.JSONDecodeError as e:
     print(f"❌ Failed to parse JSON from LLM output: {e}")
     print("The LLM likely returned malformed JSON despite the instruction.")
     exit()